@@ -1,68 +1,93 @@
 """
 Application factory pattern
 """
+import atexit
+import functools
+import importlib.util
+import logging
 import os
-from flask import Flask, render_template, request, jsonify
+import queue
+import threading
+from flask import Flask, Response, render_template, request, jsonify
 from flask_migrate import Migrate
-from app.extensions import db, login_manager, jwt, cache, limiter, mail, assets
+from app.extensions import (
+    db, migrate, bcrypt, login_manager,
+    jwt, mail, cache, limiter, cors, assets
+)
 from app.celery_app import create_celery_app
-from app.config import config
+from app.config import config, CURRENT_CONFIG
+from app.llm.huggingface_client import HuggingFaceClient
 
-# Import blueprints
-from app.main.routes import main_bp
-from app.auth.routes import auth_bp
-from app.api.routes import api_bp
-from app.history.routes import history_bp
+_LOG_FORMATTER = logging.Formatter(
+    '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
+)
+_STDOUT_HANDLER = logging.StreamHandler()
+_STDOUT_HANDLER.setFormatter(_LOG_FORMATTER)
 
+# app.logger is shared by every app instance, so file logging is set up once
+# per process; see add_file_logging(). Its threads don't survive a fork, so
+# forked children start their own in _restart_file_logging()
+_file_log_listener = None
+_file_log_lock = threading.Lock()
+_file_log_stopped = threading.Event()
+_file_log_handlers = None  # (queue handler, buffering handler, flush interval)
 
-def create_app(config_name='default'):
+# Earth Engine is initialized once per process; see ensure_earth_engine().
+# Forked children reset this state in _reset_earth_engine_after_fork()
+_data_source_manager = None
+_earth_engine_lock = threading.Lock()
+_earth_engine_ready = threading.Event()
+_earth_engine_init_started = False
+
+# The API blueprint is shared by every app, so its error handlers are
+# attached only once; see register_error_handlers()
+_api_error_handlers_registered = False
+
+# Service account keys that initialized Earth Engine. Failures aren't kept,
+# so a transient error or a key file mounted late is checked again
+_verified_earth_engine_keys = set()
+
+
+def create_app(config_name=None):
     """
     Create and configure the Flask application
     
     Args:
-        config_name: Configuration name (default, development, testing, production)
+        config_name: Configuration name (default, development, testing, production);
+            None uses the configuration selected by FLASK_ENV
         
     Returns:
         Configured Flask application
     """
-    import os
-    import logging
-    from flask import Flask
-    
-    from app.config import config
-    from app.extensions import (
-        db, migrate, bcrypt, login_manager, 
-        jwt, mail, cache, limiter, cors
-    )
-    
     # Create app
     app = Flask(__name__)
     
     # Load configuration
-    app.config.from_object(config[config_name])
+    app.config.from_object(CURRENT_CONFIG if config_name is None else config[config_name])
+    
+    register_template_globals(app)
     
     # Configure logging
     if app.config['LOG_TO_STDOUT']:
-        stream_handler = logging.StreamHandler()
-        stream_handler.setFormatter(logging.Formatter(
-            '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
-        ))
-        app.logger.addHandler(stream_handler)
+        # app.logger is shared by every app instance, so attach the handler once
+        if _STDOUT_HANDLER not in app.logger.handlers:
+            app.logger.addHandler(_STDOUT_HANDLER)
         app.logger.setLevel(logging.INFO)
     else:
-        if not os.path.exists('logs'):
-            os.mkdir('logs')
-        file_handler = logging.FileHandler('logs/geollm.log')
-        file_handler.setFormatter(logging.Formatter(
-            '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
-        ))
-        file_handler.setLevel(logging.INFO)
-        app.logger.addHandler(file_handler)
+        add_file_logging(app)
         app.logger.setLevel(logging.INFO)
     
     app.logger.info('GeoLLM startup')
     
+    # Use orjson for jsonify and request parsing when it is installed
+    try:
+        from app.json_provider import ORJSONProvider
+        app.json = ORJSONProvider(app)
+    except ImportError:
+        app.logger.warning("orjson not installed - using the standard JSON provider")
+    
     # Initialize extensions
+    init_redis_pool(app)
     db.init_app(app)
     migrate.init_app(app, db)
     bcrypt.init_app(app)
@@ -70,13 +95,21 @@ def create_app(config_name='default'):
     jwt.init_app(app)
     mail.init_app(app)
     cache.init_app(app)
+    _check_cache_pool(app)
     limiter.init_app(app)
-    cors.init_app(app)
+    # Only API routes are cross-origin; everything else skips the CORS checks
+    cors.init_app(app, resources={r'/api/*': {'origins': app.config.get('CORS_ORIGINS', '*')}})
+    
+    # LLM clients read their settings once here rather than per instance
+    HuggingFaceClient.configure(app)
     
     # Initialize Earth Engine in a background thread to not block startup
     with app.app_context():
         init_earth_engine_async(app)
     
+    # Error handlers go on the API blueprint, so they must precede its registration
+    register_error_handlers(app)
+    
     # Register blueprints
     from app.auth.routes import auth_bp
     from app.main.routes import main_bp
@@ -91,28 +124,41 @@ def create_app(config_name='default'):
     app.register_blueprint(geo_bp)
     
     # Register the agent blueprint if it exists
-    try:
+    if _has_agent_api():
         from app.routes.agent_api import agent_api
         app.register_blueprint(agent_api)
         app.logger.info("Agent API blueprint registered successfully")
-    except ImportError:
+    else:
         app.logger.warning("Agent API blueprint not found - agent architecture not available")
     
     return app
 
 
+@functools.lru_cache(maxsize=1)
+def _has_agent_api():
+    """Check once per process whether the optional agent API module is installed"""
+    # find_spec imports the parent package, so probe it first
+    return (importlib.util.find_spec('app.routes') is not None
+            and importlib.util.find_spec('app.routes.agent_api') is not None)
+
+
 def init_earth_engine_async(app):
     """Initialize Earth Engine in a background thread"""
-    import threading
+    global _earth_engine_init_started
+    
+    _earth_engine_init_started = True
+    _start_earth_engine_thread(app.logger)
+
+
+def _start_earth_engine_thread(logger):
+    """Run ensure_earth_engine() on a daemon thread, logging the outcome"""
     
     def _init_earth_engine():
         try:
-            from app.geo.data_sources import get_data_source_manager
-            # This will initialize Earth Engine when the data source manager is created
-            data_source_manager = get_data_source_manager()
-            app.logger.info("Earth Engine initialized successfully in background thread")
+            ensure_earth_engine()
+            logger.info("Earth Engine initialized successfully in background thread")
         except Exception as e:
-            app.logger.error(f"Failed to initialize Earth Engine in background thread: {str(e)}")
+            logger.error(f"Failed to initialize Earth Engine in background thread: {str(e)}")
     
     # Start the initialization in a separate thread
     thread = threading.Thread(target=_init_earth_engine)
@@ -120,31 +166,139 @@ def init_earth_engine_async(app):
     thread.start()
 
 
-def register_error_handlers(app):
-    """Register error handlers for the application"""
-    from flask import render_template, jsonify
+def ensure_earth_engine():
+    """
+    Get the process-wide data source manager, initializing Earth Engine once
     
-    # Handle 404 errors
-    @app.errorhandler(404)
-    def page_not_found(e):
-        if request.path.startswith('/api/'):
-            return jsonify(error=str(e)), 404
-        return render_template('errors/404.html'), 404
+    Concurrent first callers block on the same initialization instead of each
+    authenticating with Earth Engine; afterwards this is a plain global read.
     
-    # Handle 500 errors
-    @app.errorhandler(500)
-    def internal_server_error(e):
-        if request.path.startswith('/api/'):
-            return jsonify(error=str(e)), 500
-        return render_template('errors/500.html'), 500
+    Returns:
+        The shared data source manager
+    """
+    global _data_source_manager
     
-    # Handle 403 errors
-    @app.errorhandler(403)
-    def forbidden(e):
-        if request.path.startswith('/api/'):
-            return jsonify(error=str(e)), 403
-        return render_template('errors/403.html'), 403
+    if _data_source_manager is not None:
+        return _data_source_manager
+    
+    with _earth_engine_lock:
+        if _data_source_manager is None:
+            from app.geo.data_sources import get_data_source_manager
+            # This will initialize Earth Engine when the data source manager is created
+            _data_source_manager = get_data_source_manager()
+            _earth_engine_ready.set()
+    
+    return _data_source_manager
+
+
+def _reset_earth_engine_after_fork():
+    """
+    Give a forked child its own Earth Engine state
+    
+    The parent's init thread may hold the lock at fork time; that thread
+    doesn't exist in the child, so the copied lock would never be released.
+    The child starts over, in the background if the parent did.
+    """
+    global _data_source_manager, _earth_engine_lock, _earth_engine_ready
+    
+    _data_source_manager = None
+    _earth_engine_lock = threading.Lock()
+    _earth_engine_ready = threading.Event()
+    if _earth_engine_init_started:
+        # app.logger is the logger named after this package
+        _start_earth_engine_thread(logging.getLogger(__name__))
+
+
+os.register_at_fork(after_in_child=_reset_earth_engine_after_fork)
+
+
+def wait_for_earth_engine(timeout=30):
+    """
+    Wait for the background Earth Engine initialization to finish
+    
+    Args:
+        timeout: Maximum number of seconds to wait
+        
+    Returns:
+        True if Earth Engine is ready, False if the wait timed out
+    """
+    return _earth_engine_ready.wait(timeout)
+
+
+def init_redis_pool(app):
+    """
+    Create the Redis connection pool shared by the cache and rate limiter
+    
+    Args:
+        app: Flask application instance
+        
+    Returns:
+        The shared connection pool, or None if Redis is not configured
+    """
+    if 'redis_pool' in app.extensions:
+        return app.extensions['redis_pool']
+    
+    redis_url = app.config.get('REDIS_URL')
+    if not redis_url:
+        return None
+    
+    import redis
+    
+    # Blocking pool so bursts wait for a free connection instead of opening more
+    pool = redis.BlockingConnectionPool.from_url(
+        redis_url,
+        max_connections=app.config.get('REDIS_MAX_CONNECTIONS', 50),
+        timeout=app.config.get('REDIS_POOL_TIMEOUT', 20)
+    )
+    app.extensions['redis_pool'] = pool
+    
+    _use_pool_for_cache(app.config, pool, redis_url)
+    
+    # Flask-Limiter hands these options to its Redis storage
+    app.config['RATELIMIT_STORAGE_OPTIONS'] = {
+        **app.config.get('RATELIMIT_STORAGE_OPTIONS', {}), 'connection_pool': pool
+    }
+    
+    return pool
+
+
+def _is_redis_cache(cache_type):
+    """Check whether a Flask-Caching CACHE_TYPE refers to the Redis backend"""
+    return str(cache_type).lower() in ('redis', 'rediscache', 'flask_caching.backends.rediscache')
+
+
+def _use_pool_for_cache(cache_config, pool, redis_url):
+    """
+    Point a Redis cache configuration at the shared pool, in place
     
+    Flask-Caching builds its own client from CACHE_REDIS_URL and ignores a
+    connection_pool option, so the URL is swapped for a client on the pool.
+    Other backends, and a cache on a different Redis server, are left alone.
+    
+    Args:
+        cache_config: Flask-Caching settings to update
+        pool: Shared connection pool
+        redis_url: URL the pool connects to
+    """
+    if not _is_redis_cache(cache_config.get('CACHE_TYPE')):
+        return
+    if cache_config.get('CACHE_REDIS_URL', redis_url) != redis_url:
+        return
+    
+    import redis
+    
+    cache_config.pop('CACHE_REDIS_URL', None)
+    cache_config['CACHE_REDIS_HOST'] = redis.Redis(connection_pool=pool)
+
+
+def _check_cache_pool(app):
+    """Warn if a Redis cache ended up with its own connections instead of the shared pool"""
+    pool = app.extensions.get('redis_pool')
+    client = getattr(app.extensions.get('cache', {}).get(cache), '_write_client', None)
+    if pool is not None and client is not None and client.connection_pool is not pool:
+        app.logger.warning("Redis cache is not using the shared connection pool")
+
+
 def initialize_extensions(app):
     """Initialize Flask extensions"""
     db.init_app(app)
@@ -156,9 +310,14 @@ def initialize_extensions(app):
     
     jwt.init_app(app)
     
+    redis_pool = init_redis_pool(app)
+    
     # Set up cache with Redis if available
-    cache_config = app.config.get('CACHE_CONFIG', {'CACHE_TYPE': 'SimpleCache'})
+    cache_config = dict(app.config.get('CACHE_CONFIG', {'CACHE_TYPE': 'SimpleCache'}))
+    if redis_pool:
+        _use_pool_for_cache(cache_config, redis_pool, app.config['REDIS_URL'])
     cache.init_app(app, config=cache_config)
+    _check_cache_pool(app)
     
     # Configure limiter with Redis if available
     redis_url = app.config.get('REDIS_URL')
@@ -169,16 +328,20 @@ def initialize_extensions(app):
     mail.init_app(app)
     assets.init_app(app)
     
-    # Register asset bundles if the module exists
-    try:
-        from app.assets import register_asset_bundles
-        register_asset_bundles(assets)
-    except ImportError:
-        app.logger.warning("Asset bundling is disabled (app.assets module not found)")
+    # Register asset bundles
+    from app.bundles import register_asset_bundles
+    register_asset_bundles(assets)
 
 
 def register_blueprints(app):
     """Register Flask blueprints"""
+    # Imported here so the route modules (and the models/Earth Engine/LLM code
+    # they pull in) are only loaded once an app is actually being built
+    from app.main.routes import main_bp
+    from app.auth.routes import auth_bp
+    from app.api.routes import api_bp
+    from app.history.routes import history_bp
+    
     app.register_blueprint(main_bp)
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(api_bp, url_prefix='/api')
@@ -186,23 +349,60 @@ def register_blueprints(app):
 
 
 def register_error_handlers(app):
-    """Register error handlers"""
+    """
+    Register error handlers
+    
+    API views get JSON errors from handlers on the API blueprint. Flask prefers
+    those over the app-wide HTML handlers for requests routed to the blueprint.
+    Unrouted /api/ URLs never reach the blueprint, so the app's 404 handler
+    answers those with JSON itself. Must run before the API blueprint is
+    registered on the app.
+    """
+    global _api_error_handlers_registered
+    from app.api.routes import api_bp
+    
+    if not _api_error_handlers_registered:
+        for code in (400, 403, 404, 500):
+            api_bp.register_error_handler(code, _api_error)
+        _api_error_handlers_registered = True
+    
+    # Error templates are static, so each is rendered once per process and
+    # the bytes are reused for every later error with that status. They are
+    # kept out of the shared cache so error pages never depend on Redis.
+    error_pages = {}
+    
+    def _error_page(code):
+        page = error_pages.get(code)
+        if page is None:
+            # Render outside the failing request so nothing user-specific is kept
+            with app.test_request_context():
+                page = render_template(f'errors/{code}.html').encode('utf-8')
+            error_pages[code] = page
+        return Response(page, status=code, mimetype='text/html')
     
     @app.errorhandler(400)
     def bad_request(error):
-        return render_template('errors/400.html'), 400
+        return _error_page(400)
 
     @app.errorhandler(403)
     def forbidden(error):
-        return render_template('errors/403.html'), 403
+        return _error_page(403)
 
     @app.errorhandler(404)
     def not_found(error):
-        return render_template('errors/404.html'), 404
+        # No blueprint matched, so the API blueprint's handler didn't run
+        if request.path.startswith('/api/'):
+            return _api_error(error)
+        return _error_page(404)
 
     @app.errorhandler(500)
     def internal_server_error(error):
-        return render_template('errors/500.html'), 500
+        return _error_page(500)
+
+
+def _api_error(error):
+    """Render an HTTP error as JSON for API clients"""
+    return jsonify(error=str(error)), error.code
 
 
 def register_commands(app):
@@ -215,8 +415,6 @@ def register_commands(app):
 
 def configure_logging(app):
     """Configure application logging"""
-    import logging
-    from logging.handlers import RotatingFileHandler
     import sentry_sdk
     from sentry_sdk.integrations.flask import FlaskIntegration
     
@@ -229,44 +427,142 @@ def configure_logging(app):
                 environment=app.config.get('ENVIRONMENT', 'production'),
             )
         
+        add_file_logging(app)
+        app.logger.setLevel(logging.INFO)
+        app.logger.info('GeoLLM startup')
+
+
+def add_file_logging(app):
+    """
+    Attach a queue-backed, buffered rotating file handler to the app logger
+    
+    Request threads only put records on an in-memory queue; a listener thread
+    buffers them and writes to disk on ERROR, when the buffer fills, or every
+    LOG_FLUSH_INTERVAL seconds. Backup files are shifted in the background
+    when the log rotates.
+    
+    Args:
+        app: Flask application instance
+    """
+    global _file_log_listener, _file_log_handlers
+    from logging.handlers import MemoryHandler
+    from app.log_handlers import BackgroundRotatingFileHandler, DroppingQueueHandler
+    
+    # One listener per process, whichever app and logging path gets here
+    # first; another handler on the shared logger would duplicate every line
+    with _file_log_lock:
+        if _file_log_listener is not None:
+            app.extensions['log_listener'] = _file_log_listener
+            return
+        
         # Create logs directory if it doesn't exist
-        if not os.path.exists('logs'):
-            os.mkdir('logs')
-            
-        # Configure file handler
-        file_handler = RotatingFileHandler(
-            'logs/geollm.log', maxBytes=10485760, backupCount=10
+        log_dir = app.config.get('LOG_DIR', 'logs')
+        os.makedirs(log_dir, exist_ok=True)
+        
+        file_handler = BackgroundRotatingFileHandler(
+            os.path.join(log_dir, 'geollm.log'),
+            maxBytes=app.config.get('LOG_MAX_BYTES', 100 * 1024 * 1024),
+            backupCount=app.config.get('LOG_BACKUP_COUNT', 5)
         )
-        file_handler.setFormatter(logging.Formatter(
-            '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
-        ))
+        file_handler.setFormatter(_LOG_FORMATTER)
         file_handler.setLevel(logging.INFO)
         
-        # Add handlers to Flask app and basic logger
-        app.logger.addHandler(file_handler)
-        app.logger.setLevel(logging.INFO)
-        app.logger.info('GeoLLM startup')
+        buffered_handler = MemoryHandler(
+            capacity=app.config.get('LOG_BUFFER_CAPACITY', 1000),
+            flushLevel=logging.ERROR,
+            target=file_handler
+        )
+        
+        # Bounded, so records are dropped rather than piling up in memory
+        # if the listener can't keep up
+        queue_handler = DroppingQueueHandler(queue.Queue(app.config.get('LOG_QUEUE_SIZE', 10000)))
+        _file_log_handlers = (queue_handler, buffered_handler, app.config.get('LOG_FLUSH_INTERVAL', 30))
+        _file_log_listener = _start_file_logging(*_file_log_handlers)
+        app.extensions['log_listener'] = _file_log_listener
+        
+        atexit.register(_stop_file_logging)
+        os.register_at_fork(after_in_child=_restart_file_logging)
+        
+        app.logger.addHandler(queue_handler)
 
 
-def register_context_processors(app):
-    """Register context processors with the app"""
+def _start_file_logging(queue_handler, buffered_handler, flush_interval):
+    """
+    Start the listener and periodic flush threads behind file logging
     
-    @app.context_processor
-    def inject_global_variables():
-        """Inject global variables into all templates"""
-        from datetime import datetime
-        from flask import current_app
+    Args:
+        queue_handler: Handler on the app logger; it gets a fresh queue
+        buffered_handler: Buffering handler in front of the log file
+        flush_interval: Seconds between periodic flushes
         
-        return {
-            'current_year': datetime.now().year,
-            'current_app': current_app
-        }
+    Returns:
+        The running queue listener
+    """
+    from logging.handlers import QueueListener
+    
+    log_queue = queue.Queue(queue_handler.queue.maxsize)
+    queue_handler.queue = log_queue
+    listener = QueueListener(log_queue, buffered_handler, respect_handler_level=True)
+    listener.start()
+    
+    stopped = _file_log_stopped
+    
+    def _flush_periodically():
+        while not stopped.wait(flush_interval):
+            buffered_handler.flush()
+    
+    threading.Thread(target=_flush_periodically, daemon=True).start()
+    return listener
+
+
+def _stop_file_logging():
+    """Stop this process's file logging threads, writing out queued records"""
+    _file_log_stopped.set()
+    if _file_log_listener is not None:
+        _file_log_listener.stop()
+
+
+def _restart_file_logging():
+    """
+    Give a forked child its own file logging threads
+    
+    Without this a child (gunicorn --preload workers, Celery prefork pool)
+    would queue records that nothing reads. Locks and queues copied from the
+    parent may have been held mid-operation, so all of them are replaced.
+    """
+    global _file_log_listener, _file_log_lock, _file_log_stopped
+    
+    _file_log_lock = threading.Lock()
+    _file_log_stopped = threading.Event()
+    if _file_log_handlers is None:
+        return
+    
+    queue_handler, buffered_handler, flush_interval = _file_log_handlers
+    # The parent still writes out whatever it had buffered
+    buffered_handler.buffer.clear()
+    _file_log_listener = _start_file_logging(queue_handler, buffered_handler, flush_interval)
+
+
+def register_template_globals(app):
+    """Register variables available to all templates"""
+    from datetime import datetime
+    from flask import current_app
+    
+    # Set once instead of rebuilding a context dict on every render
+    app.jinja_env.globals['current_app'] = current_app
+    app.jinja_env.globals['current_year'] = datetime.now().year
     
+    @app.before_request
+    def refresh_current_year():
+        """Keep current_year correct across a New Year's rollover"""
+        year = datetime.now().year
+        if year != app.jinja_env.globals['current_year']:
+            app.jinja_env.globals['current_year'] = year
+
 
 def check_earth_engine_config():
     """Verify that Earth Engine is properly configured"""
     from flask import current_app
-    import os
     
     # Check for Earth Engine service account key
     gee_key = current_app.config.get('GEE_SERVICE_ACCOUNT_KEY')
@@ -274,6 +570,19 @@ def check_earth_engine_config():
         current_app.logger.error("GEE_SERVICE_ACCOUNT_KEY not configured in app settings")
         return False
     
+    if gee_key in _verified_earth_engine_keys:
+        return True
+    
+    if _check_earth_engine_key(gee_key):
+        _verified_earth_engine_keys.add(gee_key)
+        return True
+    return False
+
+
+def _check_earth_engine_key(gee_key):
+    """Check that a service account key exists and initializes Earth Engine"""
+    from flask import current_app
+    
     # Check if the key file exists
     if not os.path.exists(gee_key):
         current_app.logger.error(f"Earth Engine service account key file not found: {gee_key}")
@@ -291,4 +600,5 @@ def check_earth_engine_config():
         current_app.logger.info("Earth Engine successfully initialized")
         return True
     except Exception as e:
-        current_app.logger.error(f"Earth Engine initialization error: {str(e)}")
\ No newline at end of file
+        current_app.logger.error(f"Earth Engine initialization error: {str(e)}")
+        return False
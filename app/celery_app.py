@@ -3,6 +3,31 @@ Celery application factory for task processing
 """
 from celery import Celery
 from celery.schedules import crontab
+from flask import has_app_context
+
+
+# Periodic tasks, built once per interpreter and shared by forked workers
+BEAT_SCHEDULE = {
+    'cleanup-expired-tokens': {
+        'task': 'app.auth.tasks.cleanup_expired_tokens',
+        'schedule': crontab(hour=0, minute=0)  # run daily at midnight
+    },
+    'update-geo-data-cache': {
+        'task': 'app.geo.tasks.update_geo_data_cache',
+        'schedule': crontab(hour='*/6')  # run every 6 hours
+    },
+    'clear-old-sessions': {
+        'task': 'app.auth.tasks.clear_old_sessions',
+        'schedule': crontab(hour=2, minute=0)  # run daily at 2am
+    }
+}
+
+# Task routes for different queues
+TASK_ROUTES = {
+    'app.geo.tasks.*': {'queue': 'geo'},
+    'app.llm.tasks.*': {'queue': 'llm'},
+    'app.auth.tasks.*': {'queue': 'auth'}
+}
 
 
 def create_celery_app(app=None):
@@ -30,40 +55,38 @@ def create_celery_app(app=None):
     
     # Configure from Flask app
     if app:
-        # Update Celery configuration from Flask config
-        celery_app.conf.update(app.config)
+        # Update Celery configuration from the CELERY_* keys in the Flask config,
+        # e.g. CELERY_TASK_SERIALIZER -> task_serializer
+        celery_app.conf.update({
+            key[len('CELERY_'):].lower(): value
+            for key, value in app.config.items()
+            if key.startswith('CELERY_')
+        })
+        celery_app.conf.broker_connection_retry_on_startup = True
         
-        # Configure periodic tasks
-        celery_app.conf.beat_schedule = {
-            'cleanup-expired-tokens': {
-                'task': 'app.auth.tasks.cleanup_expired_tokens',
-                'schedule': crontab(hour=0, minute=0)  # run daily at midnight
-            },
-            'update-geo-data-cache': {
-                'task': 'app.geo.tasks.update_geo_data_cache',
-                'schedule': crontab(hour='*/6')  # run every 6 hours
-            },
-            'clear-old-sessions': {
-                'task': 'app.auth.tasks.clear_old_sessions',
-                'schedule': crontab(hour=2, minute=0)  # run daily at 2am
-            }
-        }
+        # Cap Celery's own Redis connection pool at the same size as the
+        # Flask-side pool; the two are separate pools, not one shared budget
+        celery_app.conf.redis_max_connections = app.config.get('REDIS_MAX_CONNECTIONS', 50)
         
-        # Configure task routes for different queues
-        celery_app.conf.task_routes = {
-            'app.geo.tasks.*': {'queue': 'geo'},
-            'app.llm.tasks.*': {'queue': 'llm'},
-            'app.auth.tasks.*': {'queue': 'auth'}
-        }
+        # Configure periodic tasks and task routes for different queues
+        celery_app.conf.beat_schedule = BEAT_SCHEDULE
+        celery_app.conf.task_routes = TASK_ROUTES
         
         class ContextTask(celery_app.Task):
             """Make Celery tasks work with Flask app context"""
             
             def __call__(self, *args, **kwargs):
+                # Eager and nested task calls already run inside a context
+                if has_app_context():
+                    return self.run(*args, **kwargs)
                 with app.app_context():
                     return self.run(*args, **kwargs)
                     
         celery_app.Task = ContextTask
+        
+        # Import the task modules in the parent process, so that with
+        # `celery worker --preload` forked children share them copy-on-write
+        celery_app.loader.import_default_modules()
     
     return celery_app
 
@@ -8,11 +8,128 @@ from flask import current_app
 from flask.cli import with_appcontext
 import os
 import shutil
+import subprocess
 import json
+import csv
+import itertools
+import functools
+import gzip
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+try:
+    import orjson
+except ImportError:
+    orjson = None
+from sqlalchemy import bindparam, delete, func, or_, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import raiseload
 
 from app.extensions import db
-from app.auth.models import User, ApiKey, UserProfile
-from app.history.models import QueryHistory, GeoSpatialData
+
+# Models are imported inside the functions that use them, so Flask's CLI
+# discovery (--help, shell completion) doesn't build the model metadata
+
+# Rows removed per DELETE statement/transaction in clean-history
+HISTORY_DELETE_BATCH_SIZE = 10000
+
+# Seconds a disk usage reading is reused for repeated system checks
+DISK_USAGE_TTL = 10
+
+# Write buffer size for CSV exports
+EXPORT_BUFFER_SIZE = 1 << 20
+
+
+def _create_users(users_data):
+    """
+    Create users and their profiles in a single transaction
+    
+    Args:
+        users_data: List of dicts with username, email, password and is_admin
+        
+    Returns:
+        List of created User objects
+    """
+    from app.auth.models import User, UserProfile
+    
+    created_at = datetime.datetime.utcnow()
+    users = []
+    for data in users_data:
+        user = User(
+            username=data['username'],
+            email=data['email'],
+            is_admin=data.get('is_admin', False),
+            created_at=created_at,
+            is_active=True
+        )
+        user.password = data['password']  # Will be hashed by the model
+        users.append(user)
+    
+    # One flush inserts every user (batched by SQLAlchemy) and assigns their ids
+    db.session.add_all(users)
+    db.session.flush()
+    
+    db.session.add_all([UserProfile(user_id=user.id) for user in users])
+    db.session.commit()
+    
+    return users
+
+
+def _disk_usage(path):
+    """
+    Get disk usage for the volume holding path, cached for DISK_USAGE_TTL seconds
+    
+    Args:
+        path: Directory on the volume to check
+        
+    Returns:
+        (total, used, free) in bytes
+    """
+    return _disk_usage_for_window(path, int(time.monotonic() // DISK_USAGE_TTL))
+
+
+@functools.lru_cache(maxsize=8)
+def _disk_usage_for_window(path, window):
+    # window only makes the cache key change every DISK_USAGE_TTL seconds
+    return shutil.disk_usage(path)
+
+
+@functools.lru_cache(maxsize=1)
+def _user_by_username():
+    """Build the username lookup once so SQLAlchemy reuses its compiled form"""
+    from app.auth.models import User
+    
+    return select(User).where(User.username == bindparam('username')).limit(1)
+
+
+def _get_user(username):
+    """
+    Look up a user by username
+    
+    Args:
+        username: Username to look up
+        
+    Returns:
+        User or None
+    """
+    return db.session.execute(_user_by_username(), {'username': username}).scalar_one_or_none()
+
+
+def _user_exists(*criteria):
+    """
+    Check whether any user matches the criteria
+    
+    Runs a single EXISTS query instead of loading a User row.
+    
+    Args:
+        criteria: SQLAlchemy filter expressions; none matches any user
+        
+    Returns:
+        True if a matching user exists
+    """
+    from app.auth.models import User
+    
+    return db.session.execute(select(select(User.id).where(*criteria).exists())).scalar()
 
 
 @click.command('init-db')
@@ -31,30 +148,23 @@ def init_db_command():
 @with_appcontext
 def seed_data_command():
     """Seed the database with initial data."""
+    from app.auth.models import User
+    
     try:
         # Check if we already have data
-        if User.query.count() > 0:
+        if _user_exists():
             if not click.confirm('Database already contains data. Do you want to proceed?'):
                 click.echo('Operation cancelled.')
                 return
         
         # Create default admin user if it doesn't exist
-        if not User.query.filter_by(username='admin').first():
-            admin = User(
-                username='admin',
-                email='admin@example.com',
-                is_admin=True,
-                created_at=datetime.datetime.utcnow(),
-                is_active=True
-            )
-            admin.password = 'adminpassword'  # Will be hashed by the model
-            db.session.add(admin)
-            db.session.commit()
-            
-            # Create profile for admin
-            profile = UserProfile(user_id=admin.id)
-            db.session.add(profile)
-            db.session.commit()
+        if not _user_exists(User.username == 'admin'):
+            _create_users([{
+                'username': 'admin',
+                'email': 'admin@example.com',
+                'password': 'adminpassword',
+                'is_admin': True
+            }])
             
             click.secho('Created default admin user (admin@example.com)', fg='green')
         
@@ -73,28 +183,21 @@ def seed_data_command():
 @with_appcontext
 def create_admin_command(username, email, password):
     """Create a new admin user."""
+    from app.auth.models import User
+    
     try:
         # Check if user exists
-        if User.query.filter((User.username == username) | (User.email == email)).first():
+        if _user_exists(or_(User.username == username, User.email == email)):
             click.secho(f'User with username "{username}" or email "{email}" already exists!', fg='red')
             return
         
         # Create admin user
-        admin = User(
-            username=username,
-            email=email,
-            is_admin=True,
-            created_at=datetime.datetime.utcnow(),
-            is_active=True
-        )
-        admin.password = password  # Will be hashed by the model
-        db.session.add(admin)
-        db.session.commit()
-        
-        # Create profile for admin
-        profile = UserProfile(user_id=admin.id)
-        db.session.add(profile)
-        db.session.commit()
+        _create_users([{
+            'username': username,
+            'email': email,
+            'password': password,
+            'is_admin': True
+        }])
         
         click.secho(f'Admin user "{username}" created successfully!', fg='green')
     except Exception as e:
@@ -111,7 +214,7 @@ def reset_password_command(username, password):
     """Reset a user's password."""
     try:
         # Find user
-        user = User.query.filter_by(username=username).first()
+        user = _get_user(username)
         
         if not user:
             click.secho(f'User "{username}" not found!', fg='red')
@@ -135,9 +238,11 @@ def reset_password_command(username, password):
 @with_appcontext
 def create_api_key_command(username, name, expires):
     """Create a new API key for a user."""
+    from app.auth.models import ApiKey
+    
     try:
         # Find user
-        user = User.query.filter_by(username=username).first()
+        user = _get_user(username)
         
         if not user:
             click.secho(f'User "{username}" not found!', fg='red')
@@ -165,8 +270,11 @@ def create_api_key_command(username, name, expires):
 @with_appcontext
 def list_users_command():
     """List all registered users."""
+    from app.auth.models import User
+    
     try:
-        users = User.query.all()
+        # Only column attributes are printed; refuse any relationship loads
+        users = User.query.options(raiseload('*')).all()
         
         if not users:
             click.secho('No users found.', fg='yellow')
@@ -184,8 +292,10 @@ def list_users_command():
 
 @click.command('backup-db')
 @click.option('--output', default='./backups', help='Output directory for backup file')
+@click.option('--workers', type=int, default=lambda: min(4, os.cpu_count() or 1),
+              help='Parallel pg_dump jobs (default: up to 4, PostgreSQL only)')
 @with_appcontext
-def backup_db_command(output):
+def backup_db_command(output, workers):
     """Backup the database."""
     try:
         # Ensure output directory exists
@@ -201,26 +311,37 @@ def backup_db_command(output):
         
         if 'postgresql' in db_uri:
             # PostgreSQL backup
-            from urllib.parse import urlparse
+            # Parse the database URI (make_url also decodes %-escaped passwords)
+            url = make_url(db_uri)
+            password = url.password
             
-            # Parse the database URI
-            parsed_uri = urlparse(db_uri)
-            username = parsed_uri.username
-            password = parsed_uri.password
-            database = parsed_uri.path[1:]  # Remove leading slash
-            hostname = parsed_uri.hostname
-            port = parsed_uri.port or 5432
+            # The password goes through the environment, not the command line
+            command = ['pg_dump', *_pg_connection_args(url)]
             
-            # Build the pg_dump command
-            command = f'PGPASSWORD={password} pg_dump -h {hostname} -p {port} -U {username} -d {database} -f {filepath}'
+            if workers > 1:
+                # Directory format lets pg_dump write tables in parallel
+                filepath = os.path.join(output, f'geollm_backup_{timestamp}')
+                command += ['-Fd', '-j', str(workers), '-f', filepath]
+            else:
+                filepath = os.path.join(output, f'geollm_backup_{timestamp}.dump')
+                command += ['-Fc', '-f', filepath]
             
             # Execute the command
-            result = os.system(command)
+            result = subprocess.run(command, env={**os.environ, 'PGPASSWORD': password or ''})
             
-            if result == 0:
-                click.secho(f'Database backup created successfully: {filepath}', fg='green')
-            else:
-                click.secho(f'Error creating database backup (code: {result})', fg='red')
+            if result.returncode != 0:
+                # Don't leave a partial dump that looks like a valid backup
+                if os.path.isdir(filepath):
+                    shutil.rmtree(filepath)
+                elif os.path.exists(filepath):
+                    os.remove(filepath)
+                click.secho(f'Error creating database backup (code: {result.returncode})', fg='red')
+                return
+            
+            if workers > 1:
+                filepath = _archive_backup_dir(filepath)
+            
+            click.secho(f'Database backup created successfully: {filepath}', fg='green')
         elif 'sqlite' in db_uri:
             # SQLite backup - just copy the file
             sqlite_path = db_uri.replace('sqlite:///', '')
@@ -233,6 +354,72 @@ def backup_db_command(output):
         raise
 
 
+def _pg_connection_args(url):
+    """
+    Build pg_dump connection options from a database URL
+    
+    Only parts present in the URL are passed, so libpq falls back to its own
+    defaults for the rest, e.g. the Unix socket and the current OS user.
+    
+    Args:
+        url: Parsed SQLAlchemy URL
+        
+    Returns:
+        List of command line arguments
+    """
+    args = []
+    for option, value in (
+        ('-h', url.host or url.query.get('host')),
+        ('-p', url.port),
+        ('-U', url.username),
+        ('-d', url.database)
+    ):
+        if value:
+            args += [option, str(value)]
+    return args
+
+
+def _archive_backup_dir(dirpath):
+    """
+    Pack a pg_dump directory-format backup into a single .tar.zst file
+    
+    The archive is written under a temporary name and renamed into place, and
+    the dump directory is only removed once the archive is complete. Without
+    zstd, or if tar fails, the directory is left as it is.
+    
+    Args:
+        dirpath: Directory written by pg_dump -Fd
+        
+    Returns:
+        Path of the archive, or dirpath if it was not archived
+    """
+    if not shutil.which('zstd'):
+        click.secho('zstd not found; leaving the backup as a directory.', fg='yellow')
+        return dirpath
+    
+    archive = f'{dirpath}.tar.zst'
+    partial = f'{archive}.partial'
+    result = subprocess.run([
+        'tar',
+        '--use-compress-program', 'zstd -T0 -3',
+        '-cf', partial,
+        '-C', os.path.dirname(dirpath) or '.',
+        os.path.basename(dirpath)
+    ])
+    
+    if result.returncode != 0:
+        if os.path.exists(partial):
+            os.remove(partial)
+        click.secho(f'Could not archive backup (code: {result.returncode}); '
+                    f'leaving it as a directory.', fg='yellow')
+        return dirpath
+    
+    os.replace(partial, archive)
+    if os.path.isdir(dirpath):
+        shutil.rmtree(dirpath)
+    return archive
+
+
 @click.command('clean-history')
 @click.option('--days', default=30, help='Delete history older than this many days')
 @click.option('--dry-run', is_flag=True, help='Only show what would be deleted without actually deleting')
@@ -240,23 +427,25 @@ def backup_db_command(output):
 @with_appcontext
 def clean_history_command(days, dry_run, user):
     """Clean up old query history."""
+    from app.history.models import QueryHistory
+    
     try:
         # Calculate cutoff date
         cutoff_date = datetime.datetime.utcnow() - datetime.timedelta(days=days)
         
         # Build query
-        query = QueryHistory.query.filter(QueryHistory.created_at < cutoff_date)
+        conditions = [QueryHistory.created_at < cutoff_date]
         
         # Filter by user if specified
         if user:
-            user_obj = User.query.filter_by(username=user).first()
+            user_obj = _get_user(user)
             if not user_obj:
                 click.secho(f'User "{user}" not found!', fg='red')
                 return
-            query = query.filter_by(user_id=user_obj.id)
+            conditions.append(QueryHistory.user_id == user_obj.id)
         
-        # Count queries to be deleted
-        count = query.count()
+        # Count matching queries so the confirmation shows what is at stake
+        count = QueryHistory.query.filter(*conditions).count()
         
         if count == 0:
             click.secho('No queries found matching the criteria.', fg='yellow')
@@ -268,15 +457,26 @@ def clean_history_command(days, dry_run, user):
         if dry_run:
             click.secho('Dry run - no queries were deleted.', fg='blue')
             return
-            
+        
         # Confirm deletion
         if not click.confirm('Do you want to proceed with deletion?'):
             click.echo('Operation cancelled.')
             return
         
-        # Delete queries
-        deleted_count = query.delete()
-        db.session.commit()
+        # Delete queries in batches, committing each one, so no single
+        # transaction locks the whole range of old rows
+        batch_ids = select(QueryHistory.id).where(*conditions).limit(HISTORY_DELETE_BATCH_SIZE)
+        deleted_count = 0
+        while True:
+            ids = db.session.execute(batch_ids).scalars().all()
+            if not ids:
+                break
+            result = db.session.execute(
+                delete(QueryHistory).where(QueryHistory.id.in_(ids)),
+                execution_options={'synchronize_session': False}
+            )
+            db.session.commit()
+            deleted_count += result.rowcount
         
         click.secho(f'Successfully deleted {deleted_count} queries.', fg='green')
     except Exception as e:
@@ -289,9 +489,12 @@ def clean_history_command(days, dry_run, user):
 @click.option('--user', help='Export only queries from this username')
 @click.option('--output', default='./exports', help='Output directory for export file')
 @click.option('--format', type=click.Choice(['json', 'csv']), default='json', help='Export format')
+@click.option('--gzip', 'compress', is_flag=True, help='Gzip the export file')
 @with_appcontext
-def export_queries_command(user, output, format):
+def export_queries_command(user, output, format, compress):
     """Export query history to a file."""
+    from app.history.models import QueryHistory
+    
     try:
         # Ensure output directory exists
         os.makedirs(output, exist_ok=True)
@@ -299,146 +502,265 @@ def export_queries_command(user, output, format):
         # Create timestamp for filename
         timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
         
-        # Build query
-        query = QueryHistory.query
+        # Build query over just the exported columns; rows are streamed from
+        # the database in batches instead of loaded as ORM objects up front
+        stmt = select(
+            QueryHistory.id,
+            QueryHistory.user_id,
+            QueryHistory.prompt,
+            QueryHistory.created_at,
+            QueryHistory.duration_ms,
+            QueryHistory.is_favorited
+        ).execution_options(yield_per=10000)
         
         # Filter by user if specified
         if user:
-            user_obj = User.query.filter_by(username=user).first()
+            user_obj = _get_user(user)
             if not user_obj:
                 click.secho(f'User "{user}" not found!', fg='red')
                 return
-            query = query.filter_by(user_id=user_obj.id)
+            stmt = stmt.where(QueryHistory.user_id == user_obj.id)
             filename = f'queries_{user}_{timestamp}.{format}'
         else:
             filename = f'queries_all_{timestamp}.{format}'
         
         filepath = os.path.join(output, filename)
+        if compress:
+            filepath += '.gz'
+        
+        # With psycopg2 on PostgreSQL the server formats the CSV itself via COPY
+        if format == 'csv' and db.engine.dialect.driver == 'psycopg2':
+            count = _copy_query_history_csv(filepath, compress, user_obj.id if user else None)
+            if count == 0:
+                os.remove(filepath)
+                click.secho('No queries found.', fg='yellow')
+                return
+            click.secho(f'Successfully exported {count} queries to {filepath}', fg='green')
+            return
         
         # Fetch queries
-        queries = query.all()
+        rows = iter(db.session.execute(stmt))
+        first_row = next(rows, None)
         
-        if not queries:
+        if first_row is None:
             click.secho('No queries found.', fg='yellow')
             return
         
+        rows = itertools.chain([first_row], rows)
+        count = 0
+        open_export = gzip.open if compress else open
+        
         if format == 'json':
-            # Export as JSON
-            data = [q.to_dict() for q in queries]
-            with open(filepath, 'w') as f:
-                json.dump(data, f, indent=2, default=str)
+            # Export as compact JSON, one record at a time
+            with open_export(filepath, 'wb') as f:
+                f.write(b'[')
+                for count, row in enumerate(rows, 1):
+                    if count > 1:
+                        f.write(b',')
+                    f.write(_encode_json_record(row._asdict()))
+                f.write(b']')
         elif format == 'csv':
-            # Export as CSV
-            import csv
-            with open(filepath, 'w', newline='') as f:
-                writer = csv.writer(f)
+            # Export as CSV; plain files get a 1 MiB buffer so large exports
+            # aren't dominated by write() calls (gzip buffers on its own)
+            if compress:
+                f = gzip.open(filepath, 'wt', newline='')
+            else:
+                f = open(filepath, 'w', newline='', buffering=EXPORT_BUFFER_SIZE)
+            with f:
+                # \n line endings, as PostgreSQL's COPY writes them
+                writer = csv.writer(f, lineterminator='\n')
                 
                 # Write header
                 writer.writerow(['id', 'user_id', 'prompt', 'created_at', 'duration_ms', 'is_favorited'])
                 
-                # Write data
-                for q in queries:
-                    writer.writerow([
-                        q.id,
-                        q.user_id,
-                        q.prompt,
-                        q.created_at.isoformat(),
-                        q.duration_ms,
-                        q.is_favorited
-                    ])
-        
-        click.secho(f'Successfully exported {len(queries)} queries to {filepath}', fg='green')
+                # Write data; writerows loops over the rows in C. zip stops at
+                # the last row, so the counter has ticked once per row written
+                counter = itertools.count()
+                writer.writerows(
+                    (row.id, row.user_id, row.prompt, row.created_at.isoformat(),
+                     row.duration_ms, row.is_favorited)
+                    for row, _ in zip(rows, counter)
+                )
+                count = next(counter)
+        
+        click.secho(f'Successfully exported {count} queries to {filepath}', fg='green')
     except Exception as e:
         click.secho(f'Error exporting queries: {str(e)}', fg='red')
         raise
 
 
+def _json_default(obj):
+    """Serialize values JSON has no type for; dates and times as ISO 8601"""
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    return str(obj)
+
+
+def _encode_json_record(record):
+    """Encode one export record as compact JSON bytes"""
+    if orjson is not None:
+        # Datetimes go through _json_default too, so the output doesn't
+        # depend on whether orjson is installed
+        return orjson.dumps(record, default=_json_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+    return json.dumps(record, default=_json_default, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def _copy_query_history_csv(filepath, compress=False, user_id=None):
+    """
+    Export query history to CSV with PostgreSQL's COPY
+    
+    Needs the psycopg2 driver. Columns are formatted in SQL so the file is
+    the same as the csv module path writes: ISO 8601 timestamps, True/False
+    booleans and empty fields for NULL or empty text.
+    
+    Args:
+        filepath: File to write the CSV to
+        compress: Whether to gzip the file
+        user_id: Only export queries from this user
+        
+    Returns:
+        Number of exported rows
+    """
+    from app.history.models import QueryHistory
+    
+    # created_at matches datetime.isoformat(), which drops zero microseconds
+    query = (
+        "SELECT id, user_id, NULLIF(prompt, '') AS prompt, "
+        "regexp_replace(to_char(created_at, 'YYYY-MM-DD\"T\"HH24:MI:SS.US'), "
+        r"'\.000000$', '') AS created_at, "
+        "duration_ms, "
+        "CASE WHEN is_favorited THEN 'True' WHEN NOT is_favorited THEN 'False' END AS is_favorited "
+        f"FROM {QueryHistory.__table__.name}"
+    )
+    
+    conn = db.engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        if user_id is not None:
+            query = cursor.mogrify(query + ' WHERE user_id = %s', (user_id,)).decode()
+        
+        open_export = gzip.open if compress else open
+        with open_export(filepath, 'wb') as f:
+            cursor.copy_expert(f'COPY ({query}) TO STDOUT WITH CSV HEADER', f)
+        
+        return cursor.rowcount
+    finally:
+        conn.close()
+
+
 @click.command('check-system')
 @with_appcontext
 def check_system_command():
     """Check the system status and components."""
+    from app.auth.models import ApiKey
+    
     click.secho('Performing system check...', fg='blue')
     
+    app = current_app._get_current_object()
+    config = current_app.config
+    now = datetime.datetime.utcnow()
     errors = []
     warnings = []
     
-    # Check database connection
-    click.echo('Checking database connection... ', nl=False)
-    try:
-        # Try a simple query
-        db.session.execute('SELECT 1').fetchall()
-        click.secho('OK', fg='green')
-    except Exception as e:
-        errors.append(f'Database error: {str(e)}')
-        click.secho('FAILED', fg='red')
+    # Each probe returns (status, color, error, warning)
+    def check_database():
+        try:
+            # Try a simple query
+            db.session.execute(text('SELECT 1')).scalar()
+            return 'OK', 'green', None, None
+        except Exception as e:
+            return 'FAILED', 'red', f'Database error: {str(e)}', None
     
-    # Check API keys
-    click.echo('Checking for expired API keys... ', nl=False)
-    try:
-        expired_count = ApiKey.query.filter(
-            ApiKey.expires_at < datetime.datetime.utcnow(),
-            ApiKey.is_active == True
-        ).count()
-        
-        if expired_count > 0:
-            warnings.append(f'Found {expired_count} expired but still active API keys')
-            click.secho(f'WARNING ({expired_count} expired keys)', fg='yellow')
-        else:
-            click.secho('OK', fg='green')
-    except Exception as e:
-        warnings.append(f'Could not check API keys: {str(e)}')
-        click.secho('ERROR', fg='red')
-    
-    # Check for required environment variables
-    click.echo('Checking environment variables... ', nl=False)
-    missing_vars = []
-    for var in ['SECRET_KEY', 'OPENAI_API_KEY']:
-        if not current_app.config.get(var):
-            missing_vars.append(var)
-    
-    if missing_vars:
-        warnings.append(f'Missing environment variables: {", ".join(missing_vars)}')
-        click.secho(f'WARNING (missing: {", ".join(missing_vars)})', fg='yellow')
-    else:
-        click.secho('OK', fg='green')
+    def check_api_keys():
+        try:
+            # Plain COUNT(*), without the subquery Query.count() wraps around it
+            expired_count = db.session.execute(
+                select(func.count()).select_from(ApiKey).where(
+                    ApiKey.expires_at < now,
+                    ApiKey.is_active.is_(True)
+                )
+            ).scalar()
+            
+            if expired_count > 0:
+                return (f'WARNING ({expired_count} expired keys)', 'yellow', None,
+                        f'Found {expired_count} expired but still active API keys')
+            return 'OK', 'green', None, None
+        except Exception as e:
+            return 'ERROR', 'red', None, f'Could not check API keys: {str(e)}'
     
-    # Check disk space
-    click.echo('Checking disk space... ', nl=False)
-    try:
-        import shutil
-        total, used, free = shutil.disk_usage('/')
-        
-        # Convert to GB
-        free_gb = free / (1024 ** 3)
-        total_gb = total / (1024 ** 3)
-        used_percent = (used / total) * 100
-        
-        if free_gb < 1:
-            errors.append(f'Low disk space: {free_gb:.2f} GB free ({used_percent:.1f}% used)')
-            click.secho(f'CRITICAL ({free_gb:.2f} GB free)', fg='red')
-        elif free_gb < 5:
-            warnings.append(f'Low disk space: {free_gb:.2f} GB free ({used_percent:.1f}% used)')
-            click.secho(f'WARNING ({free_gb:.2f} GB free)', fg='yellow')
-        else:
-            click.secho(f'OK ({free_gb:.2f} GB free)', fg='green')
-    except Exception as e:
-        warnings.append(f'Could not check disk space: {str(e)}')
-        click.secho('ERROR', fg='red')
+    def check_environment():
+        missing_vars = [var for var in ['SECRET_KEY', 'OPENAI_API_KEY'] if not config.get(var)]
+        
+        if missing_vars:
+            return (f'WARNING (missing: {", ".join(missing_vars)})', 'yellow', None,
+                    f'Missing environment variables: {", ".join(missing_vars)}')
+        return 'OK', 'green', None, None
+    
+    def check_disk_space():
+        try:
+            total, used, free = _disk_usage(config.get('DATA_DIR', '/'))
+            
+            # Convert to GB
+            free_gb = free / (1024 ** 3)
+            used_percent = (used / total) * 100
+            
+            if free_gb < 1:
+                return (f'CRITICAL ({free_gb:.2f} GB free)', 'red',
+                        f'Low disk space: {free_gb:.2f} GB free ({used_percent:.1f}% used)', None)
+            elif free_gb < 5:
+                return (f'WARNING ({free_gb:.2f} GB free)', 'yellow', None,
+                        f'Low disk space: {free_gb:.2f} GB free ({used_percent:.1f}% used)')
+            return f'OK ({free_gb:.2f} GB free)', 'green', None, None
+        except Exception as e:
+            return 'ERROR', 'red', None, f'Could not check disk space: {str(e)}'
+    
+    probes = [
+        ('Checking database connection... ', check_database),
+        ('Checking for expired API keys... ', check_api_keys),
+        ('Checking environment variables... ', check_environment),
+        ('Checking disk space... ', check_disk_space),
+    ]
+    
+    def run_probe(probe):
+        # Each thread gets its own app context, and with it its own DB session
+        with app.app_context():
+            return probe()
+    
+    # The probes are independent, so their I/O waits overlap
+    with ThreadPoolExecutor(max_workers=len(probes)) as executor:
+        results = list(executor.map(run_probe, [probe for _, probe in probes]))
+    
+    # Collect the report and write it out once; styles are kept in the
+    # buffer and click.echo strips them if stdout isn't a terminal
+    buf = io.StringIO()
+    
+    def out(message, **kwargs):
+        click.secho(message, file=buf, color=True, **kwargs)
+    
+    for (label, _), (status, color, error, warning) in zip(probes, results):
+        out(label, nl=False)
+        out(status, fg=color)
+        if error:
+            errors.append(error)
+        if warning:
+            warnings.append(warning)
     
     # Summary
-    click.echo('\nSystem Check Summary:')
+    out('\nSystem Check Summary:')
     if not errors and not warnings:
-        click.secho('All systems operational!', fg='green')
+        out('All systems operational!', fg='green')
     
     if warnings:
-        click.secho(f'{len(warnings)} warning(s):', fg='yellow')
+        out(f'{len(warnings)} warning(s):', fg='yellow')
         for i, warning in enumerate(warnings, 1):
-            click.secho(f'  {i}. {warning}', fg='yellow')
+            out(f'  {i}. {warning}', fg='yellow')
     
     if errors:
-        click.secho(f'{len(errors)} error(s):', fg='red')
+        out(f'{len(errors)} error(s):', fg='red')
         for i, error in enumerate(errors, 1):
-            click.secho(f'  {i}. {error}', fg='red')
+            out(f'  {i}. {error}', fg='red')
+    
+    click.echo(buf.getvalue(), nl=False)
 
 
 @click.command('generate-shell-completion')
@@ -446,8 +768,6 @@ def check_system_command():
 @click.option('--output', help='Output file (defaults to stdout)')
 def generate_shell_completion_command(shell, output):
     """Generate shell completion script."""
-    import subprocess
-    
     if shell == 'bash':
         command = 'flask --completion bash'
     elif shell == 'zsh':
@@ -0,0 +1,3 @@
+"""
+Clients for LLM providers
+"""
@@ -0,0 +1,322 @@
+"""
+Hugging Face API client for alternative LLM operations
+"""
+import re
+import json
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional, Any
+
+from flask import has_app_context
+from app.extensions import cache
+
+# Configure module logger
+logger = logging.getLogger(__name__)
+
+# (connect, read) timeout in seconds for Hugging Face API calls
+REQUEST_TIMEOUT = (3.05, 30)
+
+# Seconds raw model responses and geospatial query analyses are kept in the
+# shared cache
+QUERY_CACHE_TIMEOUT = 3600
+ANALYSIS_CACHE_TIMEOUT = 3600
+
+# Prompt tag for each chat message role
+_ROLE_TAGS = {
+    'system': '<|system|>',
+    'user': '<|user|>',
+    'assistant': '<|assistant|>'
+}
+
+# Outermost {...} span in a model response that wraps JSON in other text
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+# orjson parses model output faster when it is installed; its decode error
+# subclasses ValueError like json's does
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+
+class HuggingFaceClient:
+    """Client for interacting with Hugging Face Inference API"""
+    
+    # Defaults for new clients; configure() sets them from the app config
+    _API_KEY = None
+    _API_URL = "https://api-inference.huggingface.co/models/"
+    _DEFAULT_MODEL = "mistralai/Mistral-7B-Instruct-v0.2"
+    _CACHE_ENABLED = True
+    
+    @classmethod
+    def configure(cls, app):
+        """
+        Read the Hugging Face settings from the app config once
+        
+        Args:
+            app: Flask application
+        """
+        cls._API_KEY = app.config.get('HUGGINGFACE_API_KEY')
+        cls._API_URL = app.config.get('HUGGINGFACE_API_URL', cls._API_URL)
+        cls._DEFAULT_MODEL = app.config.get('HUGGINGFACE_DEFAULT_MODEL', cls._DEFAULT_MODEL)
+        cls._CACHE_ENABLED = app.config.get('LLM_CACHE_ENABLED', True)
+    
+    def __init__(self, api_key=None, api_url=None, default_model=None):
+        """
+        Initialize the Hugging Face client
+        
+        Args:
+            api_key: Hugging Face API key
+            api_url: Base URL for Hugging Face API
+            default_model: Default model to use
+        """
+        self.api_key = api_key or self._API_KEY
+        self.api_url = api_url or self._API_URL
+        self.default_model = default_model or self._DEFAULT_MODEL
+        
+        if not self.api_key:
+            logger.warning("Hugging Face API key is not set. API calls will likely fail.")
+        
+        # requests is only imported once a client is actually needed
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        # One session per client keeps connections to the API alive between calls
+        self._session = requests.Session()
+        self._session.headers.update({"Authorization": f"Bearer {self.api_key}"})
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=20,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=[502, 503, 504],
+                allowed_methods=frozenset(['POST'])
+            )
+        )
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+    
+    def query(self, payload: Dict[str, Any], model: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Query the Hugging Face model
+        
+        Args:
+            payload: Dict containing the query parameters
+            model: Model to use (defaults to self.default_model)
+        
+        Returns:
+            API response as dictionary
+        """
+        import requests
+        
+        model_name = model or self.default_model
+        
+        # Identical model and payload give the same cache key in every process
+        use_cache = self._CACHE_ENABLED and has_app_context()
+        if use_cache:
+            key_source = model_name + json.dumps(payload, sort_keys=True, separators=(',', ':'))
+            cache_key = f"hf:query:{hashlib.sha256(key_source.encode('utf-8')).hexdigest()}"
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        try:
+            response = self._session.post(
+                f"{self.api_url}{model_name}",
+                json=payload,
+                timeout=REQUEST_TIMEOUT
+            )
+            response.raise_for_status()  # Raise exception for 4XX/5XX responses
+            result = response.json()
+        except requests.RequestException as e:
+            logger.error(f"Hugging Face API error: {str(e)}")
+            if hasattr(e, 'response') and e.response:
+                logger.error(f"Response status: {e.response.status_code}, Content: {e.response.text}")
+            raise
+        
+        if use_cache:
+            cache.set(cache_key, result, timeout=QUERY_CACHE_TIMEOUT)
+        return result
+    
+    @staticmethod
+    def _extract_text(response):
+        """
+        Get the generated text from an inference API response
+        
+        Args:
+            response: Decoded API response
+        
+        Returns:
+            The generated text, the first item of a list response without
+            one, or the response as a string
+        """
+        # Text generation responses are a list of {'generated_text': ...}
+        try:
+            return response[0]['generated_text']
+        except (IndexError, KeyError, TypeError):
+            pass
+        
+        if isinstance(response, list) and response:
+            return response[0]
+        return str(response)
+    
+    def get_text_generation(self, 
+                          prompt: str, 
+                          model: Optional[str] = None,
+                          max_length: int = 500,
+                          temperature: float = 0.7,
+                          top_p: float = 0.9,
+                          top_k: int = 50) -> str:
+        """
+        Generate text using a Hugging Face model
+        
+        Args:
+            prompt: Text prompt
+            model: Model to use
+            max_length: Maximum length of generated text
+            temperature: Sampling temperature
+            top_p: Nucleus sampling parameter
+            top_k: Top-k sampling parameter
+        
+        Returns:
+            Generated text
+        """
+        payload = {
+            "inputs": prompt,
+            "parameters": {
+                "max_length": max_length,
+                "temperature": temperature,
+                "top_p": top_p,
+                "top_k": top_k
+            }
+        }
+        
+        return self._extract_text(self.query(payload, model))
+    
+    def get_chat_completion(self, 
+                          messages: List[Dict[str, str]], 
+                          model: Optional[str] = None,
+                          max_tokens: int = 500,
+                          temperature: float = 0.7) -> str:
+        """
+        Generate chat completion using a Hugging Face model
+        
+        Args:
+            messages: List of message dictionaries with role and content
+            model: Model to use
+            max_tokens: Maximum tokens to generate
+            temperature: Sampling temperature
+        
+        Returns:
+            Generated response text
+        """
+        # Format messages for the model (format may vary by model); messages
+        # with other roles are skipped
+        parts = []
+        for message in messages:
+            tag = _ROLE_TAGS.get(message.get('role', '').lower())
+            if tag:
+                parts.append(f"{tag}\n{message.get('content', '')}\n")
+        parts.append("<|assistant|>\n")
+        formatted_prompt = ''.join(parts)
+        
+        payload = {
+            "inputs": formatted_prompt,
+            "parameters": {
+                "max_new_tokens": max_tokens,
+                "temperature": temperature,
+                "return_full_text": False
+            }
+        }
+        
+        return self._extract_text(self.query(payload, model))
+    
+    def analyze_geospatial_query(self, query: str) -> Dict[str, Any]:
+        """
+        Analyze a geospatial query using a Hugging Face model
+        
+        Args:
+            query: User geospatial query
+        
+        Returns:
+            Dictionary with extracted parameters
+        """
+        # Repeated queries mostly differ in case and spacing, so the cached
+        # result is keyed on the normalized text
+        use_cache = self._CACHE_ENABLED and has_app_context()
+        if use_cache:
+            normalized = ' '.join(query.lower().split())
+            digest = hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+            cache_key = f'hf:geo:{self.default_model}:{digest}'
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        # Construct a prompt that instructs the model to extract structured information
+        system_message = """
+        You are a geospatial analysis assistant. The user will provide a query about
+        geospatial data. Extract the following information in JSON format:
+        - location: The geographic location or area of interest
+        - time_period: The time period of interest (if specified)
+        - data_type: The type of data or analysis requested
+        - parameters: Any specific parameters, metrics, or thresholds mentioned
+        
+        Return only valid JSON with these fields.
+        """
+        
+        prompt = f"Analyze this geospatial query: {query}"
+        
+        # Construct the messages
+        messages = [
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": prompt}
+        ]
+        
+        try:
+            response = self.get_chat_completion(messages)
+            
+            # Clean JSON parses as is; otherwise take the outermost {...} span
+            try:
+                parsed_response = _json_loads(response)
+            except ValueError:
+                match = _JSON_OBJECT_RE.search(response)
+                if match is None:
+                    raise
+                parsed_response = _json_loads(match.group(0))
+                
+        except (json.JSONDecodeError, ValueError) as e:
+            logger.warning(f"Failed to parse JSON from LLM response: {response}")
+            logger.warning(f"Error: {str(e)}")
+            
+            # Return a default structure if parsing fails
+            return {
+                "location": None, 
+                "time_period": None,
+                "data_type": None,
+                "parameters": {}
+            }
+        
+        # Only successful parses are cached, so a bad response is retried
+        if use_cache:
+            cache.set(cache_key, parsed_response, timeout=ANALYSIS_CACHE_TIMEOUT)
+        return parsed_response
+
+# Initialize a default client instance
+default_client = None
+_client_lock = threading.Lock()
+
+
+def get_huggingface_client():
+    """Get or create the default Hugging Face client"""
+    global default_client
+    
+    if default_client is None:
+        with _client_lock:
+            if default_client is None:
+                default_client = HuggingFaceClient()
+    
+    return default_client
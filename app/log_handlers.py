@@ -0,0 +1,86 @@
+"""
+Logging handlers for the application
+"""
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import QueueHandler, RotatingFileHandler
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler that drops records while its queue is full
+    
+    A bounded queue caps memory if the listener falls behind; the stock
+    handler would report every record that doesn't fit to stderr.
+    """
+    
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+class BackgroundRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler that shifts backup files in a background thread
+
+    On rollover the live file is only renamed aside and reopened. Renaming the
+    numbered backups and dropping the oldest one happens on a single worker
+    thread, so the thread doing the logging is not held up by it.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._rotation_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='log-rotation'
+        )
+
+    def _at_fork_reinit(self):
+        # logging calls this in a forked child, which has no copy of the
+        # rotation worker thread; start over with a fresh executor
+        super()._at_fork_reinit()
+        self._rotation_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='log-rotation'
+        )
+    
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        if self.backupCount > 0 and os.path.exists(self.baseFilename):
+            # Unique name so a second rollover can't clobber one still pending
+            pending = f'{self.baseFilename}.rotating.{time.time_ns()}'
+            os.rename(self.baseFilename, pending)
+            self._rotation_executor.submit(self._shift_backups, pending)
+
+        if not self.delay:
+            self.stream = self._open()
+
+    def _shift_backups(self, pending):
+        """
+        Shift existing backups up by one and move the rotated file into .1
+
+        Args:
+            pending: Path the live log file was renamed to on rollover
+        """
+        for i in range(self.backupCount - 1, 0, -1):
+            source = self.rotation_filename(f'{self.baseFilename}.{i}')
+            dest = self.rotation_filename(f'{self.baseFilename}.{i + 1}')
+            if os.path.exists(source):
+                if os.path.exists(dest):
+                    os.remove(dest)
+                os.rename(source, dest)
+
+        dest = self.rotation_filename(f'{self.baseFilename}.1')
+        if os.path.exists(dest):
+            os.remove(dest)
+        self.rotate(pending, dest)
+
+    def close(self):
+        super().close()
+        # Let any queued rotation finish before the process exits
+        self._rotation_executor.shutdown(wait=True)
@@ -1,59 +1,388 @@
 """
 OpenAI API client for LLM operations
 """
+import asyncio
 import os
 import json
 import time
 import logging
 import hashlib
+import inspect
+import threading
+import zlib
 from functools import wraps
-from typing import Dict, List, Optional, Union, Any
+from typing import Any, Dict, Iterator, List, Optional, Union
 
-import openai
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
-
-from flask import current_app
+from flask import Response, current_app, stream_with_context
 from app.extensions import cache
 
 
 # Configure module logger
 logger = logging.getLogger(__name__)
 
+# Seconds a parsed geospatial query analysis is kept in the cache
+ANALYSIS_CACHE_TIMEOUT = 86400
 
-def cache_llm_response(f):
-    """Decorator to cache LLM responses based on input parameters"""
+# orjson encodes and decodes faster when it is installed; its decode error
+# subclasses json.JSONDecodeError, so the except clauses below cover both
+try:
+    import orjson
+    
+    def _json_dumps(obj, sort_keys: bool = False) -> str:
+        option = orjson.OPT_SORT_KEYS if sort_keys else 0
+        return orjson.dumps(obj, default=str, option=option).decode()
+    
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj, sort_keys: bool = False) -> str:
+        return json.dumps(obj, default=str, sort_keys=sort_keys)
+    
+    _json_loads = json.loads
+
+
+# openai (with httpx and pydantic) and tenacity are imported where they are
+# first needed, so processes that import this module without making LLM
+# calls don't pay their import time
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Retry network, rate limit and server errors; other 4xx responses fail the same way again"""
+    import openai
+    
+    if isinstance(exc, openai.APIStatusError):
+        return isinstance(exc, openai.RateLimitError) or exc.status_code >= 500 or exc.status_code in (408, 409)
+    # Timeouts and connection errors are APIError subclasses
+    return isinstance(exc, openai.APIError)
+
+
+# Longest Retry-After honoured, so a bad header can't stall a request thread
+_MAX_RETRY_AFTER = 60
+
+
+def _retry_wait(retry_state) -> float:
+    """Wait as long as a rate-limited response asks, otherwise back off exponentially"""
+    import openai
+    from tenacity import wait_random_exponential
+    
+    exc = retry_state.outcome.exception()
+    if isinstance(exc, openai.RateLimitError):
+        headers = exc.response.headers
+        try:
+            if headers.get('retry-after-ms'):
+                return min(float(headers['retry-after-ms']) / 1000, _MAX_RETRY_AFTER)
+            if headers.get('retry-after'):
+                return min(float(headers['retry-after']), _MAX_RETRY_AFTER)
+        except ValueError:
+            pass  # e.g. an HTTP date; fall back to backoff
+    # Jittered so throttled workers don't retry in lockstep
+    return wait_random_exponential(multiplier=1, min=2, max=10)(retry_state)
+
+
+def with_retry(f):
+    """Decorator to retry transient OpenAI errors, building the policy on first call"""
+    retrying = None
+    
     @wraps(f)
     def decorated_function(*args, **kwargs):
+        nonlocal retrying
+        if retrying is None:
+            from tenacity import retry, stop_after_attempt, retry_if_exception
+            retrying = retry(
+                stop=stop_after_attempt(3),
+                wait=_retry_wait,
+                retry=retry_if_exception(_is_retryable)
+            )(f)
+        return retrying(*args, **kwargs)
+    return decorated_function
+
+
+def _pack_response(response) -> bytes:
+    """Compress a completion for the cache as JSON, which is far smaller than its pickle"""
+    return zlib.compress(response.model_dump_json(exclude_unset=True).encode())
+
+
+def _unpack_response(data: bytes):
+    """Rebuild a completion stored by _pack_response"""
+    from openai.types.chat import ChatCompletion
+    
+    return ChatCompletion.model_validate_json(zlib.decompress(data))
+
+
+# Arguments that change what the model returns. Anything else, such as the
+# end-user id in `user`, is left out of the cache key so identical requests
+# from different users share an entry
+_CACHE_KEY_PARAMS = frozenset({
+    "messages", "model", "temperature", "max_tokens", "top_p",
+    "frequency_penalty", "presence_penalty", "stop", "response_format"
+})
+
+
+def cache_llm_response(f):
+    """
+    Decorator to cache LLM responses based on input parameters
+    
+    Applied to OpenAIClient methods; the client reads the cache settings
+    once when it is created.
+    """
+    signature = inspect.signature(f)
+    
+    @wraps(f)
+    def decorated_function(self, *args, **kwargs):
         # Only cache if caching is enabled
-        if not current_app.config.get('LLM_CACHE_ENABLED', False):
-            return f(*args, **kwargs)
-            
-        # Create a cache key from the arguments
-        # Sort kwargs keys for consistent hashing
-        key_parts = [str(arg) for arg in args]
-        for k in sorted(kwargs.keys()):
-            key_parts.append(f"{k}={kwargs[k]}")
+        if not self._cache_enabled:
+            return f(self, *args, **kwargs)
             
-        # Compute MD5 hash to use as the cache key
-        cache_key = f"llm_response:{hashlib.md5(':'.join(key_parts).encode()).hexdigest()}"
+        # Create a cache key from the arguments that affect the output, bound
+        # by name so positional and keyword calls agree and with defaults
+        # filled in; the model is resolved so a changed default model
+        # doesn't reuse old entries. sort_keys keeps the key order-independent.
+        # BLAKE2b because prompts are user input and keys must not collide
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        key_params = {name: value for name, value in bound.arguments.items() if name in _CACHE_KEY_PARAMS}
+        key_params["model"] = key_params.get("model") or self.model
+        digest = hashlib.blake2b(
+            json.dumps(key_params, sort_keys=True, default=str).encode(),
+            digest_size=16
+        ).hexdigest()
+        cache_key = f"llm_completion:{digest}"
         
-        # Try to get result from cache
+        # Try to get result from cache; the backends return None on a miss,
+        # so empty but valid results still count as hits
         cached_result = cache.get(cache_key)
-        if cached_result:
-            logger.debug(f"Cache hit for LLM request: {cache_key}")
-            return cached_result
+        if cached_result is not None:
+            logger.debug("Cache hit for LLM request: %s", cache_key)
+            return _unpack_response(cached_result)
             
         # Call the original function
-        result = f(*args, **kwargs)
+        result = f(self, *args, **kwargs)
         
-        # Store in cache
-        cache.set(cache_key, result)
+        # Store in cache with an expiry so stale responses age out
+        cache.set(cache_key, _pack_response(result), timeout=self._cache_ttl)
         
         return result
     
     return decorated_function
 
 
+class TokenBucket:
+    """
+    Client-side pacing for per-minute request and token limits
+    
+    Each call reserves one request and its estimated tokens. The buckets may
+    go negative; the caller then waits until the reservation has refilled,
+    so requests stay under the limits instead of coming back as 429s.
+    """
+    
+    def __init__(self, rpm: int, tpm: Optional[int] = None):
+        """
+        Initialize the bucket full
+        
+        Args:
+            rpm: Requests allowed per minute
+            tpm: Tokens allowed per minute (None to only limit requests)
+        """
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm or 0)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _reserve(self, tokens: int) -> float:
+        """Take one request and tokens from the buckets; return seconds to wait before sending"""
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._updated
+            self._updated = now
+            
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60) - 1
+            wait = -self._requests * 60 / self.rpm
+            
+            if self.tpm:
+                # A request larger than the whole bucket can only wait for a full one
+                self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60) - min(tokens, self.tpm)
+                wait = max(wait, -self._tokens * 60 / self.tpm)
+            
+            return max(wait, 0.0)
+    
+    def acquire(self, tokens: int = 0):
+        """Block until a request using tokens may be sent"""
+        wait = self._reserve(tokens)
+        if wait:
+            time.sleep(wait)
+    
+    async def acquire_async(self, tokens: int = 0):
+        """Wait, without blocking the event loop, until a request using tokens may be sent"""
+        wait = self._reserve(tokens)
+        if wait:
+            await asyncio.sleep(wait)
+
+
+def _estimate_tokens(params: Dict[str, Any]) -> int:
+    """Rough token count of a completion request: ~4 characters per prompt token plus the output budget"""
+    prompt_chars = sum(len(message.get("content") or "") for message in params["messages"])
+    return prompt_chars // 4 + (params.get("max_tokens") or 500)
+
+
+# System prompts, built once at import rather than on every call
+_SYSTEM_PROMPT_GEO_QUERY = """\
+You are a geospatial analysis assistant. The user will provide a query about
+geospatial data. Your task is to analyze the query and extract:
+
+1. The geographic location or area of interest
+2. The time period of interest (if specified)
+3. The type of data or analysis requested
+4. Any specific parameters, metrics, or thresholds mentioned
+
+Respond with a JSON object containing these fields and provide appropriate
+value types. Be concise and accurate."""
+
+_SYSTEM_PROMPT_GEO_QUERY_BATCH = """\
+You are a geospatial analysis assistant. The user will provide numbered
+queries about geospatial data. For each query, extract:
+
+1. location: The geographic location or area of interest
+2. time_period: The time period of interest (if specified)
+3. data_type: The type of data or analysis requested
+4. parameters: Any specific parameters, metrics, or thresholds mentioned
+
+Respond with a JSON object {"results": [...]} holding one object with these
+fields per query, in the same order as the queries."""
+
+_SYSTEM_PROMPT_ANALYSIS_REPORT = """\
+You are a geospatial analysis expert. Based on the provided geospatial data
+summary and the user's original query, generate a comprehensive analysis report.
+The report should be well-structured, informative, and directly address the
+user's question. Include insights about patterns, relationships, or notable
+characteristics in the data. Use markdown formatting for headings and lists."""
+
+_SYS_MSG_GEO_QUERY = {"role": "system", "content": _SYSTEM_PROMPT_GEO_QUERY}
+_SYS_MSG_GEO_QUERY_BATCH = {"role": "system", "content": _SYSTEM_PROMPT_GEO_QUERY_BATCH}
+
+# Structured Outputs schema for analyze_geospatial_query. Strict mode needs
+# every object closed, so free-form parameters come back as name/value pairs
+_GEO_QUERY_SCHEMA = {
+    "name": "geo_query",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "location": {"type": ["string", "null"]},
+            "time_period": {"type": ["string", "null"]},
+            "data_type": {"type": ["string", "null"]},
+            "parameters": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "name": {"type": "string"},
+                        "value": {"type": "string"}
+                    },
+                    "required": ["name", "value"],
+                    "additionalProperties": False
+                }
+            }
+        },
+        "required": ["location", "time_period", "data_type", "parameters"],
+        "additionalProperties": False
+    }
+}
+
+# Models that rejected a json_schema response_format; these get JSON mode
+_JSON_SCHEMA_UNSUPPORTED = set()
+
+
+def _empty_analysis() -> Dict[str, Any]:
+    """Analysis returned for a query whose LLM response could not be parsed"""
+    return {
+        "location": None,
+        "time_period": None,
+        "data_type": None,
+        "parameters": {}
+    }
+
+
+def _compact_properties(properties: Dict[str, Any], max_keys: int = 10, max_val_len: int = 200) -> Dict[str, Any]:
+    """
+    Trim feature properties to what is worth spending prompt tokens on
+    
+    Args:
+        properties: Feature properties
+        max_keys: Most properties to keep, taken in key order
+        max_val_len: Longest string value to keep; longer ones are cut
+        
+    Returns:
+        Properties without null or empty values, with long or nested values
+        shortened to strings
+    """
+    compact = {}
+    for key in sorted(properties, key=str):
+        value = properties[key]
+        if value is None or value == '' or value == [] or value == {}:
+            continue
+        if isinstance(value, (dict, list)):
+            value = _json_dumps(value, sort_keys=True)
+        if isinstance(value, str) and len(value) > max_val_len:
+            value = value[:max_val_len] + '...'
+        compact[key] = value
+        if len(compact) == max_keys:
+            break
+    return compact
+
+
+def summarize_geojson(geospatial_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Summarize GeoJSON for an analysis report prompt
+    
+    Args:
+        geospatial_data: GeoJSON data
+        
+    Returns:
+        Dictionary with type, featureCount and the first feature's properties,
+        compacted by _compact_properties(), as exampleProperties
+    """
+    features = geospatial_data.get('features') or []
+    
+    # Properties of the first feature serve as the example
+    example_properties = {}
+    if features:
+        example_properties = _compact_properties(features[0].get('properties') or {})
+    
+    return {
+        "type": geospatial_data.get('type', 'Unknown'),
+        "featureCount": len(features),
+        "exampleProperties": example_properties
+    }
+
+
+def sse_response(chunks: Iterator[str]) -> Response:
+    """
+    Forward streamed text to the browser as server-sent events
+    
+    Each chunk is sent as a JSON-encoded data event as soon as it arrives,
+    followed by a final "done" event.
+    
+    Args:
+        chunks: Text chunks, e.g. from OpenAIClient.stream_chat_completion()
+        
+    Returns:
+        Streaming text/event-stream response
+    """
+    def events():
+        for chunk in chunks:
+            # JSON keeps newlines in the text from ending the event early
+            yield f"data: {_json_dumps(chunk)}\n\n"
+        yield "event: done\ndata: \n\n"
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        # Stop proxies such as nginx from buffering the stream
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 class OpenAIClient:
     """Client for interacting with OpenAI API"""
     
@@ -70,17 +399,41 @@ class OpenAIClient:
         
         if not self.api_key:
             raise ValueError("OpenAI API key is required")
-            
-        openai.api_key = self.api_key
-        
-   
-    # Replace it with:
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type((openai.APITimeoutError, openai.APIError, openai.APIConnectionError))
-    )
+        
+        import httpx
+        import openai
+        
+        # One client per instance keeps a pool of open connections to the API;
+        # get_openai_client() shares a single instance per process.
+        # Chat completions are retried by tenacity, so the SDK's own retries
+        # are off; stacked, the attempts and sleeps would multiply
+        self.client = openai.OpenAI(
+            api_key=self.api_key,
+            max_retries=0,
+            http_client=httpx.Client(
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+                timeout=30.0
+            )
+        )
+        
+        # Streams and Batch API calls aren't wrapped by tenacity and keep the
+        # SDK's retries; this shares the client's connection pool
+        self._retrying_client = self.client.with_options(max_retries=2)
+        
+        # Used by the coroutine API; batch_chat_completions() makes its own
+        self.async_client = openai.AsyncOpenAI(api_key=self.api_key, max_retries=0)
+        
+        # Optional pacing below the account's limits, shared by every call
+        # made through this client
+        rpm = current_app.config.get('OPENAI_RPM')
+        self._rate_limiter = TokenBucket(rpm, current_app.config.get('OPENAI_TPM')) if rpm else None
+        
+        # Read once here rather than through the app context on every call
+        self._cache_enabled = current_app.config.get('LLM_CACHE_ENABLED', False)
+        self._cache_ttl = current_app.config.get('LLM_CACHE_TTL', 3600)
+    
     @cache_llm_response
+    @with_retry
     def get_chat_completion(
         self,
         messages: List[Dict[str, str]],
@@ -91,7 +444,8 @@ class OpenAIClient:
         frequency_penalty: float = 0.0,
         presence_penalty: float = 0.0,
         stop: Optional[Union[str, List[str]]] = None,
-        user: Optional[str] = None
+        user: Optional[str] = None,
+        response_format: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         Get a completion from the OpenAI Chat API
@@ -106,6 +460,7 @@ class OpenAIClient:
             presence_penalty: Presence penalty parameter
             stop: Stop sequences
             user: End-user identifier for monitoring
+            response_format: Output format, e.g. {"type": "json_object"}
             
         Returns:
             OpenAI API response as dictionary
@@ -113,35 +468,205 @@ class OpenAIClient:
         # Track timing for performance monitoring
         start_time = time.time()
         
+        params = self._completion_params(
+            messages,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            top_p=top_p,
+            frequency_penalty=frequency_penalty,
+            presence_penalty=presence_penalty,
+            stop=stop,
+            user=user,
+            response_format=response_format
+        )
+        if self._rate_limiter:
+            self._rate_limiter.acquire(_estimate_tokens(params))
+        
         try:
-            response = openai.chat.completions.create(
-                model=model or self.model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
-                top_p=top_p,
-                frequency_penalty=frequency_penalty,
-                presence_penalty=presence_penalty,
-                stop=stop,
-                user=user
-            )
-            # Calculate duration in milliseconds
-            duration_ms = int((time.time() - start_time) * 1000)
-            
-            # Log request stats
-            logger.info(
-                f"OpenAI request completed: model={model or self.model}, "
-                f"tokens={response['usage']['total_tokens']}, "
-                f"duration={duration_ms}ms"
-            )
+            response = self.client.chat.completions.create(**params)
+            # Log request stats; arguments are only formatted if the record
+            # is emitted
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "OpenAI request completed: model=%s, tokens=%s, duration=%dms",
+                    params["model"],
+                    response.usage.total_tokens if response.usage else 'n/a',
+                    (time.time() - start_time) * 1000
+                )
             
             return response
             
         except Exception as e:
             # Log error details
-            logger.error(f"OpenAI API error: {str(e)}")
+            logger.error("OpenAI API error: %s", e)
             raise
     
+    def _completion_params(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        top_p: float = 1.0,
+        frequency_penalty: float = 0.0,
+        presence_penalty: float = 0.0,
+        stop: Optional[Union[str, List[str]]] = None,
+        user: Optional[str] = None,
+        response_format: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Build chat.completions.create arguments with get_chat_completion's defaults"""
+        params = {
+            "model": model or self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "top_p": top_p,
+            "frequency_penalty": frequency_penalty,
+            "presence_penalty": presence_penalty,
+            "stop": stop,
+            "user": user
+        }
+        if response_format is not None:
+            params["response_format"] = response_format
+        return params
+    
+    async def _acreate(self, client, params: Dict[str, Any]):
+        """Create a chat completion on an async client, retrying like get_chat_completion"""
+        from tenacity import AsyncRetrying, stop_after_attempt, retry_if_exception
+        
+        async for attempt in AsyncRetrying(
+            stop=stop_after_attempt(3),
+            wait=_retry_wait,
+            retry=retry_if_exception(_is_retryable),
+            reraise=True
+        ):
+            with attempt:
+                if self._rate_limiter:
+                    await self._rate_limiter.acquire_async(_estimate_tokens(params))
+                return await client.chat.completions.create(**params)
+    
+    async def _abatch(self, client, list_of_messages: List[List[Dict[str, str]]], kwargs: Dict[str, Any]) -> List[Any]:
+        """Run one completion per message list concurrently on client"""
+        return await asyncio.gather(
+            *(self._acreate(client, self._completion_params(messages, **kwargs)) for messages in list_of_messages),
+            return_exceptions=True
+        )
+    
+    async def aget_chat_completion(self, messages: List[Dict[str, str]], **kwargs):
+        """
+        Get a completion from the OpenAI Chat API without blocking the event loop
+        
+        Args:
+            messages: List of message dictionaries with role and content
+            **kwargs: Same options as get_chat_completion
+            
+        Returns:
+            OpenAI API response
+        """
+        return await self._acreate(self.async_client, self._completion_params(messages, **kwargs))
+    
+    async def abatch(self, list_of_messages: List[List[Dict[str, str]]], **kwargs) -> List[Any]:
+        """
+        Get completions for several conversations concurrently
+        
+        Args:
+            list_of_messages: One list of messages per completion
+            **kwargs: Same options as get_chat_completion, applied to every completion
+            
+        Returns:
+            Responses in input order; a failed completion is returned as its exception
+        """
+        return await self._abatch(self.async_client, list_of_messages, kwargs)
+    
+    def batch_chat_completions(self, list_of_messages: List[List[Dict[str, str]]], **kwargs) -> List[Any]:
+        """
+        Get completions for several conversations concurrently from synchronous code
+        
+        Args:
+            list_of_messages: One list of messages per completion
+            **kwargs: Same options as get_chat_completion, applied to every completion
+            
+        Returns:
+            Responses in input order; a failed completion is returned as its exception
+        """
+        import openai
+        
+        async def run():
+            # Pooled connections are tied to the event loop that opened them,
+            # so each asyncio.run() gets its own async client
+            async with openai.AsyncOpenAI(api_key=self.api_key, max_retries=0) as client:
+                return await self._abatch(client, list_of_messages, kwargs)
+        
+        return asyncio.run(run())
+    
+    def batch_submit(self, requests: List[Dict[str, Any]], metadata: Optional[Dict[str, str]] = None) -> str:
+        """
+        Submit chat completions to the OpenAI Batch API
+        
+        Batches finish within 24 hours at a lower price than the synchronous
+        endpoint, so they suit work nobody is waiting on.
+        
+        Args:
+            requests: Chat completion request bodies (messages, model, ...);
+                model defaults to the client's model
+            metadata: Optional metadata stored with the batch
+            
+        Returns:
+            Batch ID; results are keyed by each request's index as a string
+        """
+        lines = []
+        for i, body in enumerate(requests):
+            lines.append(json.dumps({
+                "custom_id": str(i),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {"model": self.model, **body}
+            }))
+        
+        input_file = self._retrying_client.files.create(
+            file=("batch.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch"
+        )
+        batch = self._retrying_client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+            metadata=metadata
+        )
+        return batch.id
+    
+    def batch_poll(self, batch_id: str):
+        """
+        Get the current state of a submitted batch
+        
+        Args:
+            batch_id: ID returned by batch_submit
+            
+        Returns:
+            OpenAI batch object; status is "completed" once output_file_id is set
+        """
+        return self._retrying_client.batches.retrieve(batch_id)
+    
+    def batch_results(self, output_file_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Download the results of a completed batch
+        
+        Args:
+            output_file_id: output_file_id of the completed batch
+            
+        Returns:
+            Dictionary mapping each request's custom_id to its result line
+            (with "response" or "error")
+        """
+        content = self._retrying_client.files.content(output_file_id).text
+        results = {}
+        for line in content.splitlines():
+            if line:
+                result = _json_loads(line)
+                results[result["custom_id"]] = result
+        return results
+    
     def get_prompt_response(
         self,
         prompt: str,
@@ -163,14 +688,11 @@ class OpenAIClient:
         Returns:
             Text response from the model
         """
-        messages = []
-        
-        # Add system prompt if provided
+        user_msg = {"role": "user", "content": prompt}
         if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-            
-        # Add user prompt
-        messages.append({"role": "user", "content": prompt})
+            messages = [{"role": "system", "content": system_prompt}, user_msg]
+        else:
+            messages = [user_msg]
         
         # Get completion
         response = self.get_chat_completion(
@@ -182,6 +704,100 @@ class OpenAIClient:
         
         return response.choices[0].message.content.strip()
     
+    def stream_prompt_response(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> Iterator[str]:
+        """
+        Stream the response to a single prompt as it is generated
+        
+        Responses are not cached; use get_prompt_response when the whole
+        text is needed at once.
+        
+        Args:
+            prompt: User prompt text
+            system_prompt: Optional system prompt
+            model: Model to use
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            
+        Yields:
+            Chunks of response text
+        """
+        user_msg = {"role": "user", "content": prompt}
+        if system_prompt:
+            messages = [{"role": "system", "content": system_prompt}, user_msg]
+        else:
+            messages = [user_msg]
+        
+        return self.stream_chat_completion(messages, model=model, temperature=temperature, max_tokens=max_tokens)
+    
+    def stream_chat_completion(self, messages: List[Dict[str, str]], **kwargs) -> Iterator[str]:
+        """
+        Stream a chat completion as it is generated
+        
+        Streams bypass the response cache. The upstream connection is closed
+        when the generator is, e.g. when a streaming client disconnects.
+        
+        Args:
+            messages: List of message dictionaries with role and content
+            **kwargs: Same options as get_chat_completion
+            
+        Yields:
+            Chunks of response text
+        """
+        params = self._completion_params(messages, **kwargs)
+        if self._rate_limiter:
+            self._rate_limiter.acquire(_estimate_tokens(params))
+        
+        with self._retrying_client.chat.completions.create(**params, stream=True) as stream:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+    
+    def _structured_completion(self, messages: List[Dict[str, str]], json_schema: Dict[str, Any], **kwargs) -> str:
+        """
+        Get a completion constrained to a JSON schema
+        
+        Models without Structured Outputs support fall back to JSON mode,
+        which still guarantees a JSON object but not its shape.
+        
+        Args:
+            messages: List of message dictionaries with role and content
+            json_schema: Named schema in the json_schema response_format shape
+            **kwargs: Further get_chat_completion arguments
+            
+        Returns:
+            Response content
+        """
+        import openai
+        
+        model = kwargs.get('model') or self.model
+        if model not in _JSON_SCHEMA_UNSUPPORTED:
+            try:
+                response = self.get_chat_completion(
+                    messages=messages,
+                    response_format={"type": "json_schema", "json_schema": json_schema},
+                    **kwargs
+                )
+                return response.choices[0].message.content
+            except openai.BadRequestError as e:
+                if 'response_format' not in str(e):
+                    raise
+                logger.info("%s does not support json_schema; using JSON mode", model)
+                _JSON_SCHEMA_UNSUPPORTED.add(model)
+        
+        response = self.get_chat_completion(
+            messages=messages,
+            response_format={"type": "json_object"},
+            **kwargs
+        )
+        return response.choices[0].message.content
+    
     def analyze_geospatial_query(self, query: str) -> Dict[str, Any]:
         """
         Analyze a geospatial query to extract parameters and intent
@@ -192,40 +808,89 @@ class OpenAIClient:
         Returns:
             Dictionary with extracted parameters and intent
         """
-        system_prompt = """
-        You are a geospatial analysis assistant. The user will provide a query about
-        geospatial data. Your task is to analyze the query and extract:
+        # The parsed result is cached, so a hit skips the completion and the
+        # JSON decode; queries differing only in case or spacing share it
+        cache_key = None
+        if self._cache_enabled:
+            normalized = ' '.join(query.lower().split())
+            digest = hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+            cache_key = f"llm_analysis:{self.model}:{digest}"
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached
         
-        1. The geographic location or area of interest
-        2. The time period of interest (if specified)
-        3. The type of data or analysis requested
-        4. Any specific parameters, metrics, or thresholds mentioned
+        messages = [
+            _SYS_MSG_GEO_QUERY,
+            {"role": "user", "content": f"Analyze this geospatial query: {query}"}
+        ]
         
-        Respond with a JSON object containing these fields and provide appropriate
-        value types. Be concise and accurate.
-        """
+        response = self._structured_completion(messages, _GEO_QUERY_SCHEMA, temperature=0.2)
+        try:
+            analysis = _json_loads(response)
+        except json.JSONDecodeError:
+            # Only reachable in JSON mode, or when the output was cut off
+            logger.warning("Failed to parse JSON from LLM response: %s", response)
+            return _empty_analysis()
         
-        prompt = f"Analyze this geospatial query: {query}"
+        # JSON mode guarantees valid JSON but not its shape; anything else is
+        # treated like an unparsable response and not cached
+        if not isinstance(analysis, dict):
+            logger.warning("LLM response is not a JSON object: %s", response)
+            return _empty_analysis()
         
-        try:
-            response = self.get_prompt_response(
-                prompt=prompt,
-                system_prompt=system_prompt,
-                temperature=0.2  # Lower temperature for more deterministic output
-            )
+        parameters = analysis.get('parameters')
+        if isinstance(parameters, list):
+            if not all(isinstance(p, dict) and isinstance(p.get('name'), str) and 'value' in p
+                       for p in parameters):
+                logger.warning("Malformed parameters in LLM response: %s", response)
+                return _empty_analysis()
+            analysis['parameters'] = {p['name']: p['value'] for p in parameters}
+        
+        # Only parsed results are cached, so a bad response is retried next time
+        if cache_key:
+            cache.set(cache_key, analysis, timeout=ANALYSIS_CACHE_TIMEOUT)
+        return analysis
+    
+    def analyze_geospatial_queries(self, queries: List[str], batch_size: int = 8) -> List[Dict[str, Any]]:
+        """
+        Analyze several geospatial queries, several per API request
+        
+        Args:
+            queries: User geospatial queries
+            batch_size: Queries sent together in one request
             
-            # Parse JSON response
-            return json.loads(response)
+        Returns:
+            One dictionary per query, in input order, with the same fields as
+            analyze_geospatial_query
+        """
+        results = []
+        for start in range(0, len(queries), batch_size):
+            chunk = queries[start:start + batch_size]
+            prompt = "\n".join(f"[{i}] {query}" for i, query in enumerate(chunk))
             
-        except json.JSONDecodeError:
-            # Fallback if response is not valid JSON
-            logger.warning(f"Failed to parse JSON from LLM response: {response}")
-            return {
-                "location": None,
-                "time_period": None,
-                "data_type": None,
-                "parameters": {}
-            }
+            try:
+                response = self.get_chat_completion(
+                    messages=[
+                        _SYS_MSG_GEO_QUERY_BATCH,
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.2,
+                    response_format={"type": "json_object"}
+                )
+                analyses = _json_loads(response.choices[0].message.content).get("results")
+            except (json.JSONDecodeError, AttributeError, TypeError) as e:
+                logger.warning("Failed to parse batched query analysis: %s", e)
+                analyses = None
+            
+            if not isinstance(analyses, list):
+                analyses = []
+            
+            # Missing or malformed entries get the same fallback as a single query
+            for i in range(len(chunk)):
+                analysis = analyses[i] if i < len(analyses) else None
+                results.append(analysis if isinstance(analysis, dict) else _empty_analysis())
+        
+        return results
     
     def generate_analysis_report(
         self,
@@ -237,42 +902,24 @@ class OpenAIClient:
         Generate an analysis report for geospatial data
         
         Args:
-            geospatial_data: GeoJSON data or summary
+            geospatial_data: GeoJSON data, or a summary from summarize_geojson()
             user_query: Original user query
             data_description: Optional description of the data
             
         Returns:
             Analysis report text
         """
-        # Extract basic information from the data
-        feature_count = len(geospatial_data.get('features', []))
-        data_type = geospatial_data.get('type', 'Unknown')
-        
-        # Extract feature properties for the first feature as example
-        example_properties = {}
-        if feature_count > 0:
-            first_feature = geospatial_data.get('features', [])[0]
-            example_properties = first_feature.get('properties', {})
-            
-        # Create a summary of the data for the prompt
-        data_summary = {
-            "type": data_type,
-            "featureCount": feature_count,
-            "exampleProperties": example_properties
-        }
-        
-        system_prompt = """
-        You are a geospatial analysis expert. Based on the provided geospatial data
-        summary and the user's original query, generate a comprehensive analysis report.
-        The report should be well-structured, informative, and directly address the
-        user's question. Include insights about patterns, relationships, or notable
-        characteristics in the data. Use markdown formatting for headings and lists.
-        """
+        # Callers that already hold a summary (e.g. cached alongside the data)
+        # skip walking the GeoJSON again
+        if 'featureCount' in geospatial_data:
+            data_summary = geospatial_data
+        else:
+            data_summary = summarize_geojson(geospatial_data)
         
         prompt = f"""
         User Query: {user_query}
         
-        Geospatial Data Summary: {json.dumps(data_summary)}
+        Geospatial Data Summary: {_json_dumps(data_summary, sort_keys=True)}
         
         {data_description or ''}
         
@@ -281,7 +928,7 @@ class OpenAIClient:
         
         return self.get_prompt_response(
             prompt=prompt,
-            system_prompt=system_prompt,
+            system_prompt=_SYSTEM_PROMPT_ANALYSIS_REPORT,
             temperature=0.7,
             max_tokens=1000
         )
@@ -289,12 +936,18 @@ class OpenAIClient:
 
 # Initialize a default client instance
 default_client = None
+_client_lock = threading.Lock()
+
 
 def get_openai_client():
     """Get or create the default OpenAI client"""
     global default_client
     
+    # The lock is only taken until the client exists; checking again under
+    # it keeps threads that raced past the first check from building another
     if default_client is None:
-        default_client = OpenAIClient()
-        
+        with _client_lock:
+            if default_client is None:
+                default_client = OpenAIClient()
+    
     return default_client